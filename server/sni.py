@@ -1,3 +1,5 @@
+import os
+import re
 import sys
 import subprocess
 import threading
@@ -5,30 +7,194 @@ import time
 import socket
 import json
 import shutil
-
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
-
-console = Console()
-
-results = {
-    "domain": "",
-    "tls_supported": False,
-    "http2_supported": False,
-    "http3_supported": False,
-    "cdn_used": False,
-    "redirect_found": False,
-    "negatives": [],
-    "positives": [],
-    "cdns": [],
+import heapq
+import itertools
+import argparse
+import statistics
+
+# rich and ssl are imported lazily: a bare invocation (e.g. --capabilities)
+# should not pay for them.
+
+class _LazyConsole:
+    """Proxy that creates the rich Console on first use.
+
+    Plain strings printed while output is not a terminal have their markup
+    stripped and skip rich entirely. Set `stderr` before the first print
+    to keep stdout free for --json -.
+    """
+
+    _console = None
+    stderr = False
+    _lock = threading.Lock()
+
+    def get(self):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console(stderr=self.stderr)
+        return self._console
+
+    def isatty(self):
+        return (sys.stderr if self.stderr else sys.stdout).isatty()
+
+    def print(self, *objects, **kwargs):
+        if self._console is None and not self.isatty() and all(isinstance(o, str) for o in objects):
+            text = " ".join(_MARKUP_RE.sub("", o) for o in objects)
+            # Check threads print concurrently: one write per line keeps lines whole.
+            stream = sys.stderr if self.stderr else sys.stdout
+            with self._lock:
+                stream.write(text + "\n")
+                stream.flush()
+            return
+        self.get().print(*objects, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+_MARKUP_RE = re.compile(r"\[/?[a-z][a-z ]*\]")
+
+console = _LazyConsole()
+
+REQUIRED_TOOLS = ("openssl", "curl", "dig", "whois")
+# apt packages providing the tools, where the names differ.
+TOOL_PACKAGES = {"dig": "dnsutils"}
+CAPABILITIES_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "dignezzz",
+    "sni-capabilities.json",
+)
+_capabilities = None
+
+HANDSHAKE_SAMPLES = 5
+
+# Points awarded per signal; the total is a score out of 100.
+SCORE_WEIGHTS = {
+    "tls13": 25,
+    "alpn_h2": 20,
+    "no_cdn": 15,
+    "no_redirect": 10,
+    "cert_valid": 10,
+    "rtt": 20,
 }
+# Median TCP+TLS handshake time that earns full / zero RTT points.
+RTT_BEST_MS = 20
+RTT_WORST_MS = 300
+
+def new_results(domain):
+    return {
+        "domain": domain,
+        "tls_supported": False,
+        "http2_supported": False,
+        "http3_supported": False,
+        "cdn_used": False,
+        "redirect_found": False,
+        "cdn_checked": False,
+        "redirect_checked": False,
+        "tls_version": None,
+        "alpn": None,
+        "cert_valid": None,
+        "cert_days_left": None,
+        "tcp_rtt": [],
+        # (tcp_ms, tls_ms) per completed handshake; tcp_rtt also has failed ones.
+        "handshakes": [],
+        "negatives": [],
+        "positives": [],
+        "cdns": [],
+    }
+
+def probe_capabilities():
+    import importlib.util
+    import ssl
+
+    return {
+        "fingerprint": capabilities_fingerprint(),
+        "tools": {name: shutil.which(name) for name in REQUIRED_TOOLS},
+        "python": {
+            "alpn": ssl.HAS_ALPN,
+            "rich": importlib.util.find_spec("rich") is not None,
+        },
+    }
+
+def capabilities_fingerprint():
+    return [sys.executable, sys.version, os.environ.get("PATH", "")]
+
+def cached_capabilities_valid(caps):
+    if not isinstance(caps, dict):
+        return False
+    tools, features = caps.get("tools"), caps.get("python")
+    return (
+        caps.get("fingerprint") == capabilities_fingerprint()
+        and isinstance(tools, dict)
+        and set(tools) == set(REQUIRED_TOOLS)
+        and all(path is None or (isinstance(path, str) and os.access(path, os.X_OK)) for path in tools.values())
+        and isinstance(features, dict)
+        and {"alpn", "rich"} <= set(features)
+    )
+
+def write_capabilities_cache(caps):
+    import tempfile
+
+    # Write-then-rename, so concurrent invocations never read a partial file.
+    cache_dir = os.path.dirname(CAPABILITIES_CACHE)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".capabilities-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(caps, f)
+            os.replace(tmp_path, CAPABILITIES_CACHE)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+def get_capabilities(refresh=False):
+    """Return the tool/feature probe, cached in-process and on disk.
+
+    A cached entry is reused while the interpreter and PATH are unchanged
+    and every tool it found still exists; otherwise it is probed again.
+    """
+    global _capabilities
+    if _capabilities is not None and not refresh:
+        return _capabilities
+
+    caps = None
+    if not refresh:
+        try:
+            with open(CAPABILITIES_CACHE) as f:
+                caps = json.load(f)
+        except (OSError, ValueError):
+            caps = None
+        if not cached_capabilities_valid(caps):
+            caps = None
+
+    if caps is None:
+        caps = probe_capabilities()
+        write_capabilities_cache(caps)
+
+    _capabilities = caps
+    return caps
+
+def missing_tools():
+    caps = get_capabilities()
+    missing = [name for name, path in caps["tools"].items() if path is None]
+    if missing:
+        # Something may have been installed since the probe was cached.
+        caps = get_capabilities(refresh=True)
+        missing = [name for name, path in caps["tools"].items() if path is None]
+    return missing
+
+def rich_available():
+    if get_capabilities()["python"]["rich"]:
+        return True
+    # It may have been installed since the probe was cached.
+    return get_capabilities(refresh=True)["python"]["rich"]
 
 def check_and_install_command(command_name):
     if shutil.which(command_name) is None:
         console.print(f"[yellow]Utility {command_name} not found. Installing...[/yellow]")
         proc = subprocess.run(
-            ["sudo", "apt-get", "install", "-y", command_name],
+            ["sudo", "apt-get", "install", "-y", TOOL_PACKAGES.get(command_name, command_name)],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -37,7 +203,7 @@ def check_and_install_command(command_name):
             console.print(f"[red]Error: Failed to install {command_name}. Please install it manually.[/red]")
             sys.exit(1)
 
-def check_tls(domain, progress, task_id):
+def check_tls(results, domain, progress, task_id):
     try:
         progress.update(task_id, description="Checking TLS 1.3 support...")
         proc = subprocess.run(
@@ -79,7 +245,7 @@ def check_tls(domain, progress, task_id):
         results["negatives"].append(f"Error checking TLS: {e}")
         progress.update(task_id, description="[red]Error checking TLS[/red]", completed=1)
 
-def check_http_versions(domain, progress, task_ids):
+def check_http_versions(results, domain, progress, task_ids):
     http2_task_id, http3_task_id = task_ids
 
     try:
@@ -88,6 +254,7 @@ def check_http_versions(domain, progress, task_ids):
             ["curl", "-I", "-s", "--max-time", "5", "--http2", f"https://{domain}"],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
+            timeout=10,
             text=True,
         )
         if "HTTP/2" in proc.stdout:
@@ -135,16 +302,18 @@ def check_http_versions(domain, progress, task_ids):
         results["negatives"].append(f"Error checking HTTP/3: {e}")
         progress.update(http3_task_id, description="[red]Error checking HTTP/3[/red]", completed=1)
 
-def check_redirect(domain, progress, task_id):
+def check_redirect(results, domain, progress, task_id):
     try:
         progress.update(task_id, description="Checking for redirects...")
         proc = subprocess.run(
             ["curl", "-s", "-o", "/dev/null", "-w", "%{redirect_url}", "--max-time", "5", f"https://{domain}"],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
+            timeout=10,
             text=True,
         )
         redirect_url = proc.stdout.strip()
+        results["redirect_checked"] = proc.returncode == 0
         if redirect_url:
             results["redirect_found"] = True
             results["negatives"].append(f"Redirect found: {redirect_url}")
@@ -156,7 +325,7 @@ def check_redirect(domain, progress, task_id):
         results["negatives"].append(f"Error checking redirect: {e}")
         progress.update(task_id, description="[red]Error checking redirect[/red]", completed=1)
 
-def check_cdn(domain, progress, task_id):
+def check_cdn(results, domain, progress, task_id):
     cdn_detected = False
     cdn_providers = {
         "cloudflare": "Cloudflare",
@@ -180,9 +349,11 @@ def check_cdn(domain, progress, task_id):
             ["curl", "-s", "-I", "--max-time", "5", f"https://{domain}"],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
+            timeout=10,
             text=True,
         )
         headers = proc.stdout.lower()
+        headers_ok = proc.returncode == 0
         for key, provider in cdn_providers.items():
             if key in headers:
                 results["cdn_used"] = True
@@ -196,6 +367,7 @@ def check_cdn(domain, progress, task_id):
                 ["dig", "+short", domain],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
+                timeout=5,
                 text=True,
             )
             ip = proc.stdout.strip().split('\n')[0]
@@ -204,6 +376,7 @@ def check_cdn(domain, progress, task_id):
                     ["whois", "-h", "whois.cymru.com", f" -v {ip}"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
+                    timeout=5,
                     text=True,
                 )
                 asn_info = proc.stdout.strip().split('\n')[-1]
@@ -217,20 +390,20 @@ def check_cdn(domain, progress, task_id):
 
         if not cdn_detected:
             progress.update(task_id, description="Using ipinfo.io to detect CDN...")
-            if shutil.which("jq") is None:
-                check_and_install_command("jq")
             proc = subprocess.run(
                 ["dig", "+short", domain],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
+                timeout=5,
                 text=True,
             )
             ip = proc.stdout.strip().split('\n')[0]
             if ip:
                 proc = subprocess.run(
-                    ["curl", "-s", f"https://ipinfo.io/{ip}/json"],
+                    ["curl", "-s", "--max-time", "5", f"https://ipinfo.io/{ip}/json"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
+                    timeout=10,
                     text=True,
                 )
                 json_output = proc.stdout
@@ -261,6 +434,7 @@ def check_cdn(domain, progress, task_id):
                     cdn_detected = True
                     break
 
+        results["cdn_checked"] = results["cdn_used"] or headers_ok
         if results["cdn_used"]:
             cdn_list = ', '.join(results["cdns"])
             results["negatives"].append(f"CDN used: {cdn_list}")
@@ -272,7 +446,153 @@ def check_cdn(domain, progress, task_id):
         results["negatives"].append(f"Error checking CDN: {e}")
         progress.update(task_id, description="[red]Error checking CDN[/red]", completed=1)
 
-def display_results():
+def reachable_address(domain, port, timeout=5):
+    """Return the first getaddrinfo() entry that accepts a TCP connection,
+    trying them in order the way socket.create_connection() does."""
+    error = None
+    for family, sock_type, proto, _, sockaddr in socket.getaddrinfo(domain, port, type=socket.SOCK_STREAM):
+        try:
+            with socket.socket(family, sock_type, proto) as sock:
+                sock.settimeout(timeout)
+                sock.connect(sockaddr)
+            return family, sock_type, proto, sockaddr
+        except OSError as e:
+            error = e
+    raise error or OSError(f"getaddrinfo returned no addresses for {domain}")
+
+def check_handshake(results, domain, port, progress, task_id):
+    import ssl
+
+    alpn = get_capabilities()["python"]["alpn"]
+    try:
+        progress.update(task_id, description="Measuring TCP/TLS handshake RTT...")
+        context = ssl.create_default_context()
+        if alpn:
+            context.set_alpn_protocols(["h2", "http/1.1"])
+        # Resolve once so DNS lookups stay out of the timed connects.
+        family, sock_type, proto, sockaddr = reachable_address(domain, port)
+        for _ in range(HANDSHAKE_SAMPLES):
+            with socket.socket(family, sock_type, proto) as sock:
+                sock.settimeout(5)
+                start = time.perf_counter()
+                sock.connect(sockaddr)
+                connected = time.perf_counter()
+                tcp_ms = (connected - start) * 1000
+                results["tcp_rtt"].append(tcp_ms)
+                try:
+                    with context.wrap_socket(sock, server_hostname=domain) as tls_sock:
+                        results["handshakes"].append((tcp_ms, (time.perf_counter() - connected) * 1000))
+                        results["tls_version"] = tls_sock.version()
+                        results["alpn"] = tls_sock.selected_alpn_protocol()
+                        if results["cert_valid"] is None:
+                            results["cert_valid"] = True
+                            not_after = tls_sock.getpeercert().get("notAfter")
+                            if not_after:
+                                seconds_left = ssl.cert_time_to_seconds(not_after) - time.time()
+                                results["cert_days_left"] = int(seconds_left // 86400)
+                except ssl.SSLCertVerificationError as e:
+                    # Keep sampling the RTT with verification disabled.
+                    results["cert_valid"] = False
+                    results["negatives"].append(f"Certificate verification failed: {e.verify_message}")
+                    context = ssl.create_default_context()
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                    if alpn:
+                        context.set_alpn_protocols(["h2", "http/1.1"])
+
+        if results["handshakes"]:
+            tcp_ms = statistics.median(tcp for tcp, _ in results["handshakes"])
+            tls_ms = statistics.median(tls for _, tls in results["handshakes"])
+            progress.update(task_id, description=f"[green]Handshake RTT[/green]: TCP {tcp_ms:.1f} ms, TLS {tls_ms:.1f} ms", completed=1)
+        else:
+            results["negatives"].append("TLS handshake failed")
+            progress.update(task_id, description="[red]TLS handshake failed[/red]", completed=1)
+    except Exception as e:
+        results["negatives"].append(f"Error measuring handshake RTT: {e}")
+        progress.update(task_id, description="[red]Error measuring handshake RTT[/red]", completed=1)
+
+def is_suitable(results):
+    return (
+        results["tls_supported"]
+        and results["http2_supported"]
+        and not results["cdn_used"]
+        and not results["redirect_found"]
+    )
+
+def score_candidate(results):
+    """Weighted 0-100 score built from the signals collected for one domain."""
+    score = 0.0
+    if results["tls_supported"] or results["tls_version"] == "TLSv1.3":
+        score += SCORE_WEIGHTS["tls13"]
+    if results["http2_supported"] or results["alpn"] == "h2":
+        score += SCORE_WEIGHTS["alpn_h2"]
+    # Only a check that finished can vouch for "no CDN" / "no redirect".
+    if results["cdn_checked"] and not results["cdn_used"]:
+        score += SCORE_WEIGHTS["no_cdn"]
+    if results["redirect_checked"] and not results["redirect_found"]:
+        score += SCORE_WEIGHTS["no_redirect"]
+    if results["cert_valid"]:
+        days_left = results["cert_days_left"]
+        if days_left is not None and days_left < 14:
+            score += SCORE_WEIGHTS["cert_valid"] / 2
+        else:
+            score += SCORE_WEIGHTS["cert_valid"]
+    if results["handshakes"]:
+        # Latency earns points linearly between RTT_WORST_MS and RTT_BEST_MS.
+        # Jitter (absolute sample spread, on the same scale) takes off at most half.
+        totals = [tcp + tls for tcp, tls in results["handshakes"]]
+        median = statistics.median(totals)
+        latency = (RTT_WORST_MS - median) / (RTT_WORST_MS - RTT_BEST_MS)
+        latency = min(1.0, max(0.0, latency))
+        jitter = (max(totals) - min(totals)) / (RTT_WORST_MS - RTT_BEST_MS)
+        score += SCORE_WEIGHTS["rtt"] * latency * (1 - min(0.5, jitter))
+    return round(score, 1)
+
+def summarize_candidate(results, score):
+    return {
+        "domain": results["domain"],
+        "score": score,
+        "suitable": bool(is_suitable(results)),
+        "tls_version": results["tls_version"],
+        "alpn": results["alpn"],
+        "tcp_rtt_ms": round(statistics.median(results["tcp_rtt"]), 1) if results["tcp_rtt"] else None,
+        "tls_rtt_ms": round(statistics.median(tls for _, tls in results["handshakes"]), 1) if results["handshakes"] else None,
+        "cdns": list(results["cdns"]),
+        "redirect": results["redirect_found"],
+        "cert_valid": results["cert_valid"],
+        "cert_days_left": results["cert_days_left"],
+    }
+
+class CandidateRanker:
+    """Keeps only the best `size` candidates seen so far in a min-heap.
+
+    Suitable domains always rank above unsuitable ones, then by score.
+    Full per-domain results are dropped once summarized.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.seen = 0
+        self._heap = []
+
+    def add(self, results, order=None):
+        """Rank one scan; `order` is its input position, earlier wins ties."""
+        score = score_candidate(results)
+        summary = summarize_candidate(results, score)
+        if order is None:
+            order = self.seen
+        entry = ((summary["suitable"], score), -order, summary)
+        self.seen += 1
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+        return summary
+
+    def best(self):
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+def display_results(results):
     console.print("\n[bold cyan]===== Check Results =====[/bold cyan]\n")
     reasons = []
     positives = []
@@ -311,49 +631,339 @@ def display_results():
             for positive in positives:
                 console.print(f"[green]- {positive}[/green]")
 
-def main():
-    if len(sys.argv) != 2:
-        console.print("[bold red]Usage: script.py <domain>[/bold red]")
-        sys.exit(1)
+def display_shortlist(candidates, seen):
+    from rich.table import Table
+
+    console.print(f"\n[bold cyan]===== Top {len(candidates)} of {seen} candidates =====[/bold cyan]\n")
+    table = Table()
+    table.add_column("#", justify="right")
+    table.add_column("Domain")
+    table.add_column("Score", justify="right")
+    table.add_column("Suitable")
+    table.add_column("TLS")
+    table.add_column("ALPN")
+    table.add_column("TCP/TLS RTT, ms", justify="right")
+    table.add_column("CDN")
+    table.add_column("Redirect")
+    table.add_column("Cert days", justify="right")
+    for place, candidate in enumerate(candidates, 1):
+        rtt = "-"
+        if candidate["tls_rtt_ms"] is not None:
+            rtt = f"{candidate['tcp_rtt_ms']} / {candidate['tls_rtt_ms']}"
+        table.add_row(
+            str(place),
+            candidate["domain"],
+            f"{candidate['score']:.1f}",
+            "[green]yes[/green]" if candidate["suitable"] else "[red]no[/red]",
+            candidate["tls_version"] or "-",
+            candidate["alpn"] or "-",
+            rtt,
+            ", ".join(candidate["cdns"]) or "-",
+            "yes" if candidate["redirect"] else "no",
+            "-" if candidate["cert_days_left"] is None else str(candidate["cert_days_left"]),
+        )
+    console.print(table)
+
+CHECK_TASKS = [
+    ("tls", "Checking TLS 1.3 support..."),
+    ("http2", "Checking HTTP/2 support..."),
+    ("http3", "Checking HTTP/3 support..."),
+    ("redirect", "Checking for redirects..."),
+    ("cdn", "Checking CDN usage..."),
+    ("handshake", "Measuring TCP/TLS handshake RTT..."),
+]
+
+class _NullProgress:
+    """Stands in for rich Progress in batch mode, where per-check updates are not shown."""
+
+    def update(self, task_id, **fields):
+        pass
+
+class _PlainProgress:
+    """Prints each check's final status line; used instead of rich Progress when output is not a terminal."""
+
+    def update(self, task_id, description=None, completed=None, **fields):
+        if completed and description:
+            console.print(description)
+
+def run_checks(results, domain, progress, tasks, stagger=0.0):
+    threads = []
+
+    t_tls = threading.Thread(target=check_tls, args=(results, domain, progress, tasks['tls']))
+    t_http_versions = threading.Thread(target=check_http_versions, args=(results, domain, progress, (tasks['http2'], tasks['http3'])))
+    t_redirect = threading.Thread(target=check_redirect, args=(results, domain, progress, tasks['redirect']))
+    t_cdn = threading.Thread(target=check_cdn, args=(results, domain, progress, tasks['cdn']))
+    t_handshake = threading.Thread(target=check_handshake, args=(results, domain, 443, progress, tasks['handshake']))
 
-    domain = sys.argv[1]
-    results["domain"] = domain
+    threads.extend([t_tls, t_http_versions, t_redirect, t_cdn, t_handshake])
 
-    check_and_install_command("openssl")
-    check_and_install_command("curl")
-    check_and_install_command("dig")
-    check_and_install_command("whois")
+    for t in threads:
+        t.start()
+        if stagger:
+            time.sleep(stagger)
 
+    for t in threads:
+        t.join()
+
+def scan_domain(domain):
+    results = new_results(domain)
     console.print(f"\n[bold cyan]Checking domain:[/bold cyan] {domain}")
 
+    if not console.isatty():
+        run_checks(results, domain, _PlainProgress(), {key: None for key, _ in CHECK_TASKS})
+        return results
+
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
     with Progress(
         SpinnerColumn(finished_text=""),
         TextColumn("{task.description}"),
+        console=console.get(),
     ) as progress:
-        tasks = {}
-        tasks['tls'] = progress.add_task("Checking TLS 1.3 support...", total=1)
-        tasks['http2'] = progress.add_task("Checking HTTP/2 support...", total=1)
-        tasks['http3'] = progress.add_task("Checking HTTP/3 support...", total=1)
-        tasks['redirect'] = progress.add_task("Checking for redirects...", total=1)
-        tasks['cdn'] = progress.add_task("Checking CDN usage...", total=1)
+        tasks = {key: progress.add_task(description, total=1) for key, description in CHECK_TASKS}
+        run_checks(results, domain, progress, tasks, stagger=0.1)
+
+    return results
+
+def scan_domain_quiet(domain):
+    results = new_results(domain)
+    run_checks(results, domain, _NullProgress(), {key: None for key, _ in CHECK_TASKS})
+    return results
+
+class BatchStats:
+    """Counters for a batch run.
+
+    Workers only add and remove their own entry in `in_flight` (single dict
+    operations, atomic under the GIL); every other field is written by the
+    main thread, so the view can read a snapshot without taking a lock.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.in_flight = {}
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        if not rate:
+            return None
+        return (self.total - self.done) / rate
+
+    def slowest(self, count=5):
+        now = time.monotonic()
+        in_flight = sorted(self.in_flight.copy().values(), key=lambda entry: entry[1])
+        return [(domain, now - started) for domain, started in in_flight[:count]]
+
+def format_duration(seconds):
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+class BatchView:
+    """Aggregate progress for a batch run, redrawn at most every `interval` seconds.
+
+    On a terminal it is a rich Live panel; otherwise it prints a plain status
+    line every LOG_INTERVAL seconds.
+    """
+
+    REFRESH_INTERVAL = 0.5
+    LIVE_TOP = 10
+    LOG_INTERVAL = 5.0
+
+    def __init__(self, stats, ranker, interactive):
+        self.stats = stats
+        self.ranker = ranker
+        self.interactive = interactive
+        self.interval = self.REFRESH_INTERVAL if interactive else self.LOG_INTERVAL
+        self._last = 0.0
+        self._live = None
+
+    def __enter__(self):
+        if self.interactive:
+            from rich.live import Live
+            self._live = Live(self.render(), console=console.get(), auto_refresh=False)
+            self._live.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.refresh(force=True)
+        if self._live is not None:
+            self._live.__exit__(*exc_info)
+
+    def status_line(self):
+        stats = self.stats
+        return (
+            f"done {stats.done}/{stats.total}  in-flight {len(stats.in_flight)}  "
+            f"failed {stats.failed}  {stats.rate():.1f} scans/s  ETA {format_duration(stats.eta())}"
+        )
+
+    def render(self):
+        from rich.console import Group
+        from rich.table import Table
+
+        top = Table(title="Top passing candidates", title_justify="left")
+        top.add_column("Domain")
+        top.add_column("Score", justify="right")
+        top.add_column("TCP/TLS RTT, ms", justify="right")
+        passing = [candidate for candidate in self.ranker.best() if candidate["suitable"]]
+        for candidate in passing[:self.LIVE_TOP]:
+            rtt = "-"
+            if candidate["tls_rtt_ms"] is not None:
+                rtt = f"{candidate['tcp_rtt_ms']} / {candidate['tls_rtt_ms']}"
+            top.add_row(candidate["domain"], f"{candidate['score']:.1f}", rtt)
+
+        slow = Table(title="Slowest in-flight", title_justify="left")
+        slow.add_column("Domain")
+        slow.add_column("Elapsed", justify="right")
+        for domain, elapsed in self.stats.slowest():
+            slow.add_row(domain, f"{elapsed:.1f}s")
+
+        return Group(f"[bold cyan]{self.status_line()}[/bold cyan]", top, slow)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        if self._live is not None:
+            self._live.update(self.render(), refresh=True)
+        else:
+            print(self.status_line(), file=sys.stderr, flush=True)
 
-        threads = []
+def reachable(results):
+    """Hosts we could not even connect to are not candidates."""
+    return results is not None and bool(results["tcp_rtt"])
 
-        t_tls = threading.Thread(target=check_tls, args=(domain, progress, tasks['tls']))
-        t_http_versions = threading.Thread(target=check_http_versions, args=(domain, progress, (tasks['http2'], tasks['http3'])))
-        t_redirect = threading.Thread(target=check_redirect, args=(domain, progress, tasks['redirect']))
-        t_cdn = threading.Thread(target=check_cdn, args=(domain, progress, tasks['cdn']))
+def _scan_worker(stats, index, domain):
+    stats.in_flight[index] = (domain, time.monotonic())
+    try:
+        return index, scan_domain_quiet(domain)
+    finally:
+        del stats.in_flight[index]
 
-        threads.extend([t_tls, t_http_versions, t_redirect, t_cdn])
+def run_batch(domains, ranker, jobs):
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-        for t in threads:
-            t.start()
-            time.sleep(0.1)
+    stats = BatchStats(len(domains))
+    queue = enumerate(domains)
+    pending = set()
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        with BatchView(stats, ranker, console.isatty()) as view:
+            while True:
+                # Only keep `jobs` scans submitted so results are consumed as they stream in.
+                for index, domain in itertools.islice(queue, jobs - len(pending)):
+                    pending.add(executor.submit(_scan_worker, stats, index, domain))
+                if not pending:
+                    break
+                finished, pending = wait(pending, timeout=view.interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stats.done += 1
+                    try:
+                        index, results = future.result()
+                    except Exception:
+                        results = None
+                    if not reachable(results):
+                        stats.failed += 1
+                    else:
+                        # Completion order varies between runs, input order does not.
+                        ranker.add(results, order=index)
+                view.refresh()
+    finally:
+        # Drop scans that have not started yet, e.g. on Ctrl-C.
+        executor.shutdown(cancel_futures=True)
+
+def read_domains(args):
+    domains = []
+    for arg in args:
+        if arg == "-":
+            domains.extend(line.strip() for line in sys.stdin if line.strip() and not line.startswith("#"))
+        else:
+            domains.append(arg)
+    return domains
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        usage="script.py [--top N] [--jobs N] [--json FILE] [--install-deps] <domain> [<domain> ...]",
+        description="Check whether domains are suitable as SNI for Reality. "
+                    "With several domains (or '-' to read them from stdin) a ranked shortlist is printed.",
+    )
+    parser.add_argument("domains", nargs="*", help="domains to check, '-' reads one per line from stdin")
+    parser.add_argument("--top", type=int, default=10, help="number of best candidates to keep (default: 10)")
+    parser.add_argument("--jobs", type=int, default=8, help="domains scanned concurrently in batch mode (default: 8)")
+    parser.add_argument("--json", metavar="FILE", help="also write the shortlist as JSON to FILE ('-' for stdout)")
+    parser.add_argument("--install-deps", action="store_true", help="install missing tools with apt-get before checking")
+    parser.add_argument("--capabilities", action="store_true", help="print the cached tool/feature probe and exit")
+    return parser.parse_args()
 
-        for t in threads:
-            t.join()
+def main():
+    args = parse_args()
+    if args.capabilities:
+        print(json.dumps(get_capabilities(), indent=2))
+        return
+    if args.json == "-":
+        console.stderr = True
+
+    domains = read_domains(args.domains)
+    if not domains or args.top < 1 or args.jobs < 1:
+        console.print("[bold red]Usage: script.py [--top N] [--jobs N] [--json FILE] [--install-deps] <domain> [<domain> ...][/bold red]")
+        sys.exit(1)
 
-    display_results()
+    if args.install_deps:
+        for command_name in REQUIRED_TOOLS:
+            check_and_install_command(command_name)
+        get_capabilities(refresh=True)
+
+    # Batch runs and terminal output render with rich; only plain
+    # single-domain output works without it.
+    if (len(domains) > 1 or console.isatty()) and not rich_available():
+        print("Error: the Python module 'rich' is required for this output.", file=sys.stderr)
+        print("Install it with 'pip install rich' or 'sudo apt-get install python3-rich'.", file=sys.stderr)
+        sys.exit(1)
+
+    missing = missing_tools()
+    if missing:
+        packages = " ".join(TOOL_PACKAGES.get(name, name) for name in missing)
+        console.print(f"[red]Error: required utilities not found: {', '.join(missing)}.[/red]")
+        console.print(f"[yellow]Install them with 'sudo apt-get install {packages}' or rerun with --install-deps.[/yellow]")
+        sys.exit(1)
+
+    # Room for the live top list even when --top is smaller; trimmed on output.
+    ranker = CandidateRanker(max(args.top, BatchView.LIVE_TOP))
+    if len(domains) == 1:
+        results = scan_domain(domains[0])
+        display_results(results)
+        if reachable(results):
+            summary = ranker.add(results)
+            console.print(f"[bold]Candidate score for {domains[0]}:[/bold] {summary['score']:.1f}/100")
+        else:
+            console.print(f"[red]Could not connect to {domains[0]}:443, not ranked[/red]")
+    else:
+        run_batch(domains, ranker, args.jobs)
+        display_shortlist(ranker.best()[:args.top], ranker.seen)
+
+    if args.json:
+        shortlist = json.dumps(ranker.best()[:args.top], indent=2)
+        if args.json == "-":
+            print(shortlist)
+        else:
+            with open(args.json, "w") as f:
+                f.write(shortlist + "\n")
+
+    if len(domains) == 1 and not ranker.seen:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+
+# Measures per-invocation startup of sni.py / dest.py next to a bare
+# interpreter and to the eager rich/requests imports the scripts used to do.
+#
+# "--capabilities" covers imports + the cached tool probe. "<domain>" runs the
+# real single-domain path with stdout redirected (the shell-loop case), with
+# subprocesses, DNS and tool discovery stubbed out so no network I/O happens;
+# the host is then unreachable, so those runs are expected to exit 1.
+#
+# Usage: python3 startup_bench.py [runs]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Run as `python -c STUB script.py args...`.
+STUB = """
+import runpy, shutil, socket, subprocess, sys
+
+def fake_run(args, **kwargs):
+    return subprocess.CompletedProcess(args, 1, "", "")
+
+def no_dns(*args, **kwargs):
+    raise socket.gaierror("network disabled by startup_bench")
+
+subprocess.run = fake_run
+socket.getaddrinfo = no_dns
+socket.create_connection = lambda *args, **kwargs: socket.socket()
+shutil.which = lambda name: "/bin/true"
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+def script_case(script, *args):
+    return [sys.executable, os.path.join(HERE, script), *args]
+
+def stubbed_case(script, *args):
+    return [sys.executable, "-c", STUB, os.path.join(HERE, script), *args]
+
+# (name, command, expected exit code)
+CASES = [
+    ("python -c pass", [sys.executable, "-c", "pass"], 0),
+    ("eager rich+requests imports", [sys.executable, "-c", "import rich.console, rich.progress, rich.table, requests; rich.console.Console()"], 0),
+    ("sni.py --capabilities", script_case("sni.py", "--capabilities"), 0),
+    ("dest.py --capabilities", script_case("dest.py", "--capabilities"), 0),
+    ("sni.py <domain>, stubbed", stubbed_case("sni.py", "example.com"), 1),
+    ("dest.py <domain>, stubbed", stubbed_case("dest.py", "example.com"), 1),
+]
+
+def run_once(name, command, expected):
+    proc = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != expected:
+        sys.exit(f"{name}: exited with {proc.returncode}, expected {expected}\n{proc.stderr}")
+
+def time_command(name, command, expected, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_once(name, command, expected)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # A private capabilities cache, so the stubbed tool paths never leak into the real one.
+    with tempfile.TemporaryDirectory(prefix="startup_bench-") as cache_home:
+        os.environ["XDG_CACHE_HOME"] = cache_home
+
+        baseline = None
+        print(f"{'case':<30} {'median ms':>10} {'min ms':>8} {'over python':>12}")
+        for name, command, expected in CASES:
+            # One untimed run warms the OS file cache and the capabilities cache.
+            run_once(name, command, expected)
+            timings = time_command(name, command, expected, runs)
+            median = statistics.median(timings)
+            if baseline is None:
+                baseline = median
+            print(f"{name:<30} {median:>10.1f} {min(timings):>8.1f} {median - baseline:>+12.1f}")
+
+if __name__ == "__main__":
+    main()